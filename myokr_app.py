@@ -1,6 +1,13 @@
 import streamlit as st
 import sqlite3
 import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
 import pandas as pd
 from datetime import datetime, date
 import json
@@ -8,10 +15,163 @@ from typing import Dict, List, Optional
 import plotly.express as px
 import plotly.graph_objects as go
 
+# orjson is optional; fall back to the stdlib encoder when it is not installed
+try:
+    import orjson
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    json_loads = orjson.loads
+except ImportError:
+    json_dumps = json.dumps
+    json_loads = json.loads
+
+DB_PATH = 'myokr.db'
+
+STATUS_OPTIONS = ("Not Started", "In Progress", "Completed", "On Hold")
+
+# Serializes writes on the shared connection across Streamlit script threads.
+# Streamlit re-executes this module on every rerun, so process-wide objects
+# have to come from st.cache_resource rather than plain module globals.
+@st.cache_resource
+def _get_write_lock():
+    return threading.Lock()
+
+_write_lock = _get_write_lock()
+
+# SQL statements. Kept as module constants so every call passes the identical
+# string and hits the connection's prepared statement cache.
+SQL_INSERT_USER = '''
+    INSERT INTO users (username, email, password_hash, salt, role, department_id, team_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_GET_USER_BY_USERNAME = '''
+    SELECT id, username, email, password_hash, salt, role, department_id, team_id
+    FROM users WHERE username = ?
+'''
+SQL_USER_EXISTS = 'SELECT 1 FROM users WHERE username = ? OR email = ? LIMIT 1'
+SQL_UPDATE_USER_PASSWORD = 'UPDATE users SET password_hash = ?, salt = ? WHERE id = ?'
+
+SQL_GET_ORG_TREE = '''
+    SELECT * FROM (
+        SELECT o.id as org_id, o.name as org_name, o.description as org_description,
+               d.id as dept_id, d.name as dept_name, d.description as dept_description,
+               t.id as team_id, t.name as team_name, t.description as team_description
+        FROM organizations o
+        LEFT JOIN departments d ON d.organization_id = o.id
+        LEFT JOIN teams t ON t.department_id = d.id
+        UNION ALL
+        -- Departments without an existing organization
+        SELECT NULL, NULL, NULL, d.id, d.name, d.description, t.id, t.name, t.description
+        FROM departments d
+        LEFT JOIN teams t ON t.department_id = d.id
+        WHERE d.organization_id IS NULL OR d.organization_id NOT IN (SELECT id FROM organizations)
+        UNION ALL
+        -- Teams without an existing department
+        SELECT NULL, NULL, NULL, NULL, NULL, NULL, t.id, t.name, t.description
+        FROM teams t
+        WHERE t.department_id IS NULL OR t.department_id NOT IN (SELECT id FROM departments)
+    )
+    ORDER BY org_id IS NULL, org_id, dept_id IS NULL, dept_id, team_id
+'''
+SQL_GET_TEAMS = 'SELECT * FROM teams'
+SQL_GET_TEAM_USERS = 'SELECT id, username, email, role FROM users WHERE team_id = ?'
+SQL_INSERT_ORGANIZATION = 'INSERT INTO organizations (name, description) VALUES (?, ?)'
+SQL_INSERT_DEPARTMENT = 'INSERT INTO departments (name, description, organization_id) VALUES (?, ?, ?)'
+SQL_INSERT_TEAM = 'INSERT INTO teams (name, description, department_id) VALUES (?, ?, ?)'
+
+SQL_INSERT_OKR = '''
+    INSERT INTO okrs (title, description, objective, key_results, team_id,
+                      assigned_user_id, created_by, start_date, end_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    RETURNING id, title
+'''
+# List views only need these columns; description and key_results are fetched per OKR
+SQL_GET_OKRS_SUMMARY = '''
+    SELECT o.id, o.title, o.objective, o.progress, o.status, t.name as team_name,
+           u.username as assigned_user, o.start_date, o.end_date
+    FROM okrs o
+    LEFT JOIN users u ON o.assigned_user_id = u.id
+    LEFT JOIN teams t ON o.team_id = t.id
+'''
+SQL_GET_OKRS_SUMMARY_BY_TEAM = SQL_GET_OKRS_SUMMARY + 'WHERE o.team_id = ?'
+SQL_GET_OKRS_SUMMARY_BY_USER = SQL_GET_OKRS_SUMMARY + 'WHERE o.assigned_user_id = ?'
+# Analytics aggregates are grouped by SQLite so only one row per bucket reaches pandas
+SQL_GET_PROGRESS_BINS = '''
+    SELECT CASE
+               WHEN progress <= 25 THEN '0-25%'
+               WHEN progress <= 50 THEN '26-50%'
+               WHEN progress <= 75 THEN '51-75%'
+               ELSE '76-100%'
+           END as bin,
+           COUNT(*) as count
+    FROM okrs GROUP BY bin ORDER BY bin
+'''
+SQL_GET_STATUS_COUNTS = 'SELECT status, COUNT(*) as count FROM okrs GROUP BY status ORDER BY count DESC'
+SQL_GET_TEAM_PERFORMANCE = '''
+    SELECT t.name as team_name, ROUND(AVG(o.progress), 2) as avg_progress, COUNT(*) as total_okrs
+    FROM okrs o JOIN teams t ON o.team_id = t.id
+    GROUP BY t.name ORDER BY t.name
+'''
+SQL_GET_OKR_TABLE = '''
+    SELECT o.title, o.objective, o.progress, o.status, u.username as assigned_user, t.name as team_name
+    FROM okrs o
+    LEFT JOIN users u ON o.assigned_user_id = u.id
+    LEFT JOIN teams t ON o.team_id = t.id
+    ORDER BY o.created_at DESC, o.id DESC LIMIT ?
+'''
+# All four dashboard metrics computed in one pass by SQLite
+SQL_GET_USER_OKR_STATS = '''
+    SELECT COUNT(*) as total,
+           COALESCE(SUM(status = 'Completed'), 0) as completed,
+           COALESCE(SUM(status = 'In Progress'), 0) as in_progress,
+           COALESCE(AVG(progress), 0) as avg_progress
+    FROM okrs WHERE assigned_user_id = ?
+'''
+SQL_GET_RECENT_OKRS = '''
+    SELECT id, title, objective, progress, status
+    FROM okrs WHERE assigned_user_id = ?
+    ORDER BY created_at DESC, id DESC LIMIT ?
+'''
+SQL_UPDATE_OKR_PROGRESS = 'UPDATE okrs SET progress = ?, status = ? WHERE id = ?'
+SQL_DELETE_OKR = 'DELETE FROM okrs WHERE id = ?'
+
+SQL_INSERT_KEY_RESULT = 'INSERT INTO okr_key_results (okr_id, position, text) VALUES (?, ?, ?)'
+SQL_GET_KEY_RESULTS = 'SELECT text, progress FROM okr_key_results WHERE okr_id = ? ORDER BY position'
+SQL_DELETE_KEY_RESULTS = 'DELETE FROM okr_key_results WHERE okr_id = ?'
+SQL_GET_UNMIGRATED_KEY_RESULTS = '''
+    SELECT id, key_results FROM okrs
+    WHERE NOT EXISTS (SELECT 1 FROM okr_key_results kr WHERE kr.okr_id = okrs.id)
+'''
+
 # Database setup
+@st.cache_resource
+def get_conn():
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None,
+                           cached_statements=256)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=normal')
+    conn.execute('PRAGMA temp_store=memory')
+    conn.execute('PRAGMA cache_size=-64000')
+    conn.row_factory = sqlite3.Row
+    return conn
+
+@contextmanager
+def _transaction():
+    # The connection runs in autocommit mode, so group statements explicitly
+    with _write_lock:
+        conn = get_conn()
+        conn.execute('BEGIN')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
 def init_database():
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
+    cursor = get_conn().cursor()
     
     # Users table
     cursor.execute('''
@@ -20,6 +180,7 @@ def init_database():
             username TEXT UNIQUE NOT NULL,
             email TEXT UNIQUE NOT NULL,
             password_hash TEXT NOT NULL,
+            salt BLOB,
             role TEXT NOT NULL,
             department_id INTEGER,
             team_id INTEGER,
@@ -27,6 +188,11 @@ def init_database():
         )
     ''')
     
+    # Per-user salt for PBKDF2 hashes; NULL for accounts hashed with legacy SHA-256
+    user_columns = [row['name'] for row in cursor.execute('PRAGMA table_info(users)')]
+    if 'salt' not in user_columns:
+        cursor.execute('ALTER TABLE users ADD COLUMN salt BLOB')
+    
     # Organizations table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS organizations (
@@ -83,162 +249,327 @@ def init_database():
         )
     ''')
     
-    conn.commit()
-    conn.close()
+    # Key results table, one row per key result of an OKR
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS okr_key_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            okr_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            progress REAL DEFAULT 0,
+            FOREIGN KEY (okr_id) REFERENCES okrs (id)
+        )
+    ''')
+    
+    # Indexes for the filter columns used by the helpers below.
+    # users(username) and users(email) are already indexed by their UNIQUE constraints.
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_okrs_user ON okrs (assigned_user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_okrs_team ON okrs (team_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_team ON users (team_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_dept_org ON departments (organization_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_teams_dept ON teams (department_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_key_results_okr ON okr_key_results (okr_id, position)')
+    
+    migrate_key_results()
+    
+    # Refresh planner statistics when they are stale (cheap no-op otherwise)
+    cursor.execute('PRAGMA optimize')
+
+@st.cache_resource
+def _db_ready():
+    # Schema setup and migrations run once per process, not on every rerun
+    init_database()
+    return True
+
+def migrate_key_results():
+    # Copy key results stored as JSON on okrs rows into okr_key_results
+    with _transaction() as conn:
+        legacy_okrs = conn.execute(SQL_GET_UNMIGRATED_KEY_RESULTS).fetchall()
+        conn.executemany(SQL_INSERT_KEY_RESULT, [
+            (okr['id'], position, text)
+            for okr in legacy_okrs
+            for position, text in enumerate(json_loads(okr['key_results']))
+        ])
 
 # Authentication functions
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+PBKDF2_ITERATIONS = 200_000
+KDF_CACHE_SIZE = 128
+
+def hash_password(password: str, salt: bytes) -> str:
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS).hex()
 
-def verify_password(password: str, hashed: str) -> bool:
-    return hash_password(password) == hashed
+@st.cache_resource
+def _get_kdf_cache():
+    # LRU of derived hashes keyed by an HMAC of the password under a random
+    # per-process key, so plaintext passwords are never kept in the cache
+    return os.urandom(32), OrderedDict(), threading.Lock()
+
+def _cached_password_hash(password: str, salt: bytes) -> str:
+    mac_key, entries, lock = _get_kdf_cache()
+    cache_key = (hmac.new(mac_key, password.encode(), 'sha256').digest(), salt)
+    with lock:
+        if cache_key in entries:
+            entries.move_to_end(cache_key)
+            return entries[cache_key]
+    
+    hashed = hash_password(password, salt)
+    with lock:
+        entries[cache_key] = hashed
+        while len(entries) > KDF_CACHE_SIZE:
+            entries.popitem(last=False)
+    return hashed
+
+def clear_password_cache():
+    _, entries, lock = _get_kdf_cache()
+    with lock:
+        entries.clear()
+
+def verify_password(password: str, hashed: str, salt: Optional[bytes] = None) -> bool:
+    if salt is None:
+        candidate = hashlib.sha256(password.encode()).hexdigest()
+    else:
+        candidate = _cached_password_hash(password, salt)
+    return hmac.compare_digest(candidate, hashed)
+
+def user_exists(username: str, email: str) -> bool:
+    return get_conn().execute(SQL_USER_EXISTS, (username, email)).fetchone() is not None
 
 def create_user(username: str, email: str, password: str, role: str, department_id: int = None, team_id: int = None):
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
+    # Checked up front so duplicates skip the password hash and the failed INSERT
+    if user_exists(username, email):
+        return False
     
+    salt = os.urandom(16)
+    # Hashed before taking the lock so the KDF doesn't block other writers
+    password_hash = hash_password(password, salt)
     try:
-        cursor.execute('''
-            INSERT INTO users (username, email, password_hash, role, department_id, team_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (username, email, hash_password(password), role, department_id, team_id))
-        conn.commit()
+        with _write_lock:
+            get_conn().execute(
+                SQL_INSERT_USER,
+                (username, email, password_hash, salt, role, department_id, team_id)
+            )
         return True
     except sqlite3.IntegrityError:
+        # Another session registered the same username or email since the check
         return False
-    finally:
-        conn.close()
 
 def authenticate_user(username: str, password: str) -> Optional[Dict]:
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT id, username, email, password_hash, role, department_id, team_id
-        FROM users WHERE username = ?
-    ''', (username,))
-    
-    user = cursor.fetchone()
-    conn.close()
+    user = get_conn().execute(SQL_GET_USER_BY_USERNAME, (username,)).fetchone()
     
-    if user and verify_password(password, user[3]):
+    if user and verify_password(password, user['password_hash'], user['salt']):
+        if user['salt'] is None:
+            # Upgrade legacy SHA-256 hashes now that the plaintext is known
+            salt = os.urandom(16)
+            password_hash = hash_password(password, salt)
+            with _write_lock:
+                get_conn().execute(
+                    SQL_UPDATE_USER_PASSWORD,
+                    (password_hash, salt, user['id'])
+                )
         return {
-            'id': user[0],
-            'username': user[1],
-            'email': user[2],
-            'role': user[4],
-            'department_id': user[5],
-            'team_id': user[6]
+            'id': user['id'],
+            'username': user['username'],
+            'email': user['email'],
+            'role': user['role'],
+            'department_id': user['department_id'],
+            'team_id': user['team_id']
         }
     return None
 
+# Rows are converted to dicts before caching since sqlite3.Row cannot be pickled
+def _rows_to_dicts(rows) -> List[Dict]:
+    return [dict(row) for row in rows]
+
+# Cache versioning: read helpers are cached per version, mutators bump it.
+# The version is passed as a regular argument because st.cache_data does not
+# hash parameters with a leading underscore. Versions are process-wide, like
+# the st.cache_data entries they key, so every session sees each write.
+@st.cache_resource
+def _get_data_versions() -> Dict[str, int]:
+    return {}
+
+def _data_version(name: str) -> int:
+    return _get_data_versions().get(name, 0)
+
+def _bump_data_version(name: str):
+    versions = _get_data_versions()
+    with _write_lock:
+        versions[name] = versions.get(name, 0) + 1
+
 # Database helper functions
-def get_organizations():
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM organizations')
-    orgs = cursor.fetchall()
-    conn.close()
-    return orgs
-
-def get_departments(org_id: int = None):
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
-    if org_id:
-        cursor.execute('SELECT * FROM departments WHERE organization_id = ?', (org_id,))
-    else:
-        cursor.execute('SELECT * FROM departments')
-    deps = cursor.fetchall()
-    conn.close()
-    return deps
-
-def get_teams(department_id: int = None):
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
-    if department_id:
-        cursor.execute('SELECT * FROM teams WHERE department_id = ?', (department_id,))
-    else:
-        cursor.execute('SELECT * FROM teams')
-    teams = cursor.fetchall()
-    conn.close()
-    return teams
+def get_org_tree():
+    return _get_org_tree_cached(_data_version('org_version'))
+
+@st.cache_data(ttl=60)
+def _get_org_tree_cached(version: int):
+    # Organizations with nested departments and teams, built from one ordered JOIN.
+    # Departments and teams whose parent is missing are grouped last under an
+    # "Unassigned" entry with id None, so callers can keep them out of selectboxes.
+    rows = get_conn().execute(SQL_GET_ORG_TREE).fetchall()
+    tree = []
+    for (org_id, org_name, org_description), org_rows in groupby(
+            rows, key=itemgetter('org_id', 'org_name', 'org_description')):
+        departments = []
+        for (dept_id, dept_name, dept_description), dept_rows in groupby(
+                org_rows, key=itemgetter('dept_id', 'dept_name', 'dept_description')):
+            teams = [
+                {'id': row['team_id'], 'name': row['team_name'], 'description': row['team_description']}
+                for row in dept_rows if row['team_id'] is not None
+            ]
+            if dept_id is None:
+                # An organization without departments yields a single empty row
+                if not teams:
+                    continue
+                dept_name = "Unassigned"
+            departments.append({'id': dept_id, 'name': dept_name, 'description': dept_description, 'teams': teams})
+        if org_id is None:
+            org_name = "Unassigned"
+        tree.append({'id': org_id, 'name': org_name, 'description': org_description, 'departments': departments})
+    return tree
+
+def get_teams():
+    return _get_teams_cached(_data_version('org_version'))
+
+@st.cache_data(ttl=60)
+def _get_teams_cached(version: int):
+    return _rows_to_dicts(get_conn().execute(SQL_GET_TEAMS))
 
 def get_team_users(team_id: int):
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, username, email, role FROM users WHERE team_id = ?', (team_id,))
-    users = cursor.fetchall()
-    conn.close()
-    return users
+    return get_conn().execute(SQL_GET_TEAM_USERS, (team_id,)).fetchall()
 
 # OKR functions
 def create_okr(title: str, description: str, objective: str, key_results: List[str], 
-               team_id: int, assigned_user_id: int, created_by: int, start_date: date, end_date: date):
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO okrs (title, description, objective, key_results, team_id, 
-                         assigned_user_id, created_by, start_date, end_date)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (title, description, objective, json.dumps(key_results), team_id, 
-          assigned_user_id, created_by, start_date, end_date))
-    
-    conn.commit()
-    conn.close()
+               team_id: int, assigned_user_id: int, created_by: int, start_date: date, end_date: date) -> Dict:
+    return create_okrs_bulk([(title, description, objective, key_results, team_id,
+                              assigned_user_id, created_by, start_date, end_date)])[0]
+
+def create_okrs_bulk(rows: List[tuple]) -> List[Dict]:
+    # Each row follows create_okr's argument order; all rows are inserted in one transaction.
+    # okrs.key_results is NOT NULL in existing databases, so the JSON copy is still written,
+    # but okr_key_results is what the app reads.
+    created = []
+    key_result_rows = []
+    with _transaction() as conn:
+        for (title, description, objective, key_results, team_id,
+             assigned_user_id, created_by, start_date, end_date) in rows:
+            # Inserted one row at a time because executemany can't hand back each row's
+            # RETURNING id, which the key results below need
+            okr = dict(conn.execute(SQL_INSERT_OKR, (
+                title, description, objective, json_dumps(key_results), team_id,
+                assigned_user_id, created_by, start_date, end_date
+            )).fetchall()[0])
+            created.append(okr)
+            key_result_rows.extend((okr['id'], position, text) for position, text in enumerate(key_results))
+        conn.executemany(SQL_INSERT_KEY_RESULT, key_result_rows)
+    _bump_data_version('okr_version')
+    return created
 
-def get_okrs(team_id: int = None, user_id: int = None):
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
+def get_okrs_summary(team_id: int = None, user_id: int = None):
+    return _get_okrs_summary_cached(team_id, user_id, _data_version('okr_version'))
+
+@st.cache_data(ttl=60)
+def _get_okrs_summary_cached(team_id: int, user_id: int, version: int):
+    cursor = get_conn().cursor()
     
     if team_id:
-        cursor.execute('''
-            SELECT o.*, u.username as assigned_user, c.username as created_by_user, t.name as team_name
-            FROM okrs o
-            LEFT JOIN users u ON o.assigned_user_id = u.id
-            LEFT JOIN users c ON o.created_by = c.id
-            LEFT JOIN teams t ON o.team_id = t.id
-            WHERE o.team_id = ?
-        ''', (team_id,))
+        cursor.execute(SQL_GET_OKRS_SUMMARY_BY_TEAM, (team_id,))
     elif user_id:
-        cursor.execute('''
-            SELECT o.*, u.username as assigned_user, c.username as created_by_user, t.name as team_name
-            FROM okrs o
-            LEFT JOIN users u ON o.assigned_user_id = u.id
-            LEFT JOIN users c ON o.created_by = c.id
-            LEFT JOIN teams t ON o.team_id = t.id
-            WHERE o.assigned_user_id = ?
-        ''', (user_id,))
+        cursor.execute(SQL_GET_OKRS_SUMMARY_BY_USER, (user_id,))
     else:
-        cursor.execute('''
-            SELECT o.*, u.username as assigned_user, c.username as created_by_user, t.name as team_name
-            FROM okrs o
-            LEFT JOIN users u ON o.assigned_user_id = u.id
-            LEFT JOIN users c ON o.created_by = c.id
-            LEFT JOIN teams t ON o.team_id = t.id
-        ''')
-    
-    okrs = cursor.fetchall()
-    conn.close()
-    return okrs
-
-def update_okr_progress(okr_id: int, progress: float, status: str):
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        UPDATE okrs SET progress = ?, status = ? WHERE id = ?
-    ''', (progress, status, okr_id))
+        cursor.execute(SQL_GET_OKRS_SUMMARY)
     
-    conn.commit()
-    conn.close()
+    return _rows_to_dicts(cursor.fetchall())
+
+def get_progress_bins():
+    return _get_progress_bins_cached(_data_version('okr_version'))
+
+@st.cache_data(ttl=60)
+def _get_progress_bins_cached(version: int):
+    return pd.read_sql_query(SQL_GET_PROGRESS_BINS, get_conn())
+
+def get_status_counts():
+    return _get_status_counts_cached(_data_version('okr_version'))
+
+@st.cache_data(ttl=60)
+def _get_status_counts_cached(version: int):
+    return pd.read_sql_query(SQL_GET_STATUS_COUNTS, get_conn())
+
+def get_team_performance():
+    return _get_team_performance_cached(_data_version('okr_version'))
+
+@st.cache_data(ttl=60)
+def _get_team_performance_cached(version: int):
+    return pd.read_sql_query(SQL_GET_TEAM_PERFORMANCE, get_conn())
+
+def get_okr_table(limit: int = 500):
+    return _get_okr_table_cached(limit, _data_version('okr_version'))
+
+@st.cache_data(ttl=60)
+def _get_okr_table_cached(limit: int, version: int):
+    return pd.read_sql_query(SQL_GET_OKR_TABLE, get_conn(), params=(limit,))
+
+def get_user_okr_stats(user_id: int):
+    return _get_user_okr_stats_cached(user_id, _data_version('okr_version'))
+
+@st.cache_data(ttl=60)
+def _get_user_okr_stats_cached(user_id: int, version: int):
+    return dict(get_conn().execute(SQL_GET_USER_OKR_STATS, (user_id,)).fetchone())
 
-def delete_okr(okr_id: int):
-    conn = sqlite3.connect('myokr.db')
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM okrs WHERE id = ?', (okr_id,))
-    conn.commit()
-    conn.close()
+def get_recent_okrs(user_id: int, limit: int = 3):
+    return _get_recent_okrs_cached(user_id, limit, _data_version('okr_version'))
+
+@st.cache_data(ttl=60)
+def _get_recent_okrs_cached(user_id: int, limit: int, version: int):
+    return _rows_to_dicts(get_conn().execute(SQL_GET_RECENT_OKRS, (user_id, limit)))
+
+def save_okr_changes(updates: List[tuple], deleted_ids: List[int]):
+    # Updates are (progress, status, okr_id) tuples; updates and deletes share one transaction
+    delete_params = [(okr_id,) for okr_id in deleted_ids]
+    with _transaction() as conn:
+        conn.executemany(SQL_UPDATE_OKR_PROGRESS, updates)
+        conn.executemany(SQL_DELETE_KEY_RESULTS, delete_params)
+        conn.executemany(SQL_DELETE_OKR, delete_params)
+    _bump_data_version('okr_version')
+
+def get_key_results(okr_id: int):
+    return _get_key_results_cached(okr_id, _data_version('okr_version'))
+
+@st.cache_data(ttl=60)
+def _get_key_results_cached(okr_id: int, version: int):
+    return _rows_to_dicts(get_conn().execute(SQL_GET_KEY_RESULTS, (okr_id,)))
+
+# Chart builders take tuples of (label, value) pairs and are cached on them,
+# so unchanged data reuses the figure and no DataFrame has to be hashed
+@st.cache_data(ttl=60, max_entries=32)
+def build_progress_pie(progress_counts: tuple):
+    names, values = zip(*progress_counts) if progress_counts else ((), ())
+    return px.pie(values=values, names=names, title="OKR Progress Distribution")
+
+@st.cache_data(ttl=60, max_entries=32)
+def build_status_bar(status_counts: tuple):
+    statuses, counts = zip(*status_counts) if status_counts else ((), ())
+    return px.bar(x=statuses, y=counts, title="OKR Status Distribution")
+
+@st.cache_data(ttl=60, max_entries=32)
+def build_team_progress_bar(team_progress: tuple):
+    teams, progress = zip(*team_progress) if team_progress else ((), ())
+    return px.bar(x=teams, y=progress, title="Average Progress by Team")
+
+def show_key_results(okrs: List[Dict], key: str):
+    # Key results are only loaded for the OKR the user picks
+    titles = {okr['id']: okr['title'] for okr in okrs}
+    okr_id = st.selectbox(
+        "Show Key Results",
+        list(titles),
+        format_func=titles.get,
+        index=None,
+        placeholder="Select an OKR",
+        key=key
+    )
+    if okr_id is not None:
+        st.markdown("**Key Results:**")
+        for i, kr in enumerate(get_key_results(okr_id), 1):
+            st.markdown(f"  {i}. {kr['text']}")
 
 # Initialize session state
 def init_session_state():
@@ -288,7 +619,7 @@ def main():
     </style>
     """, unsafe_allow_html=True)
     
-    init_database()
+    _db_ready()
     init_session_state()
     
     if not st.session_state.authenticated:
@@ -338,6 +669,7 @@ def show_main_app():
         st.markdown(f"**Role:** {st.session_state.user['role']}")
         
         if st.button("Logout"):
+            clear_password_cache()
             st.session_state.authenticated = False
             st.session_state.user = None
             st.rerun()
@@ -371,31 +703,28 @@ def show_dashboard():
     # Metrics
     col1, col2, col3, col4 = st.columns(4)
     
-    # Get user's OKRs
-    user_okrs = get_okrs(user_id=st.session_state.user['id'])
+    # Get user's OKR stats
+    stats = get_user_okr_stats(st.session_state.user['id'])
     
     with col1:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("My OKRs", len(user_okrs))
+        st.metric("My OKRs", stats['total'])
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
-        completed_okrs = len([okr for okr in user_okrs if okr[6] == 'Completed'])
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Completed", completed_okrs)
+        st.metric("Completed", stats['completed'])
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col3:
-        in_progress_okrs = len([okr for okr in user_okrs if okr[6] == 'In Progress'])
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("In Progress", in_progress_okrs)
+        st.metric("In Progress", stats['in_progress'])
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col4:
-        if user_okrs:
-            avg_progress = sum([okr[5] for okr in user_okrs]) / len(user_okrs)
+        if stats['total']:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("Avg Progress", f"{avg_progress:.1f}%")
+            st.metric("Avg Progress", f"{stats['avg_progress']:.1f}%")
             st.markdown('</div>', unsafe_allow_html=True)
         else:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
@@ -404,20 +733,21 @@ def show_dashboard():
     
     # Recent OKRs
     st.markdown("###  Recent OKRs")
-    if user_okrs:
-        for okr in user_okrs[:3]:  # Show last 3 OKRs
+    recent_okrs = get_recent_okrs(st.session_state.user['id'])
+    if recent_okrs:
+        for okr in recent_okrs:  # Show last 3 OKRs
             with st.container():
                 st.markdown('<div class="okr-card">', unsafe_allow_html=True)
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
-                    st.markdown(f"**{okr[1]}**")  # title
-                    st.markdown(f"*{okr[3]}*")   # objective
-                    st.progress(okr[5] / 100)    # progress
+                    st.markdown(f"**{okr['title']}**")
+                    st.markdown(f"*{okr['objective']}*")
+                    st.progress(okr['progress'] / 100)
                 
                 with col2:
-                    st.markdown(f"**Status:** {okr[6]}")
-                    st.markdown(f"**Progress:** {okr[5]:.1f}%")
+                    st.markdown(f"**Status:** {okr['status']}")
+                    st.markdown(f"**Progress:** {okr['progress']:.1f}%")
                 
                 st.markdown('</div>', unsafe_allow_html=True)
     else:
@@ -443,14 +773,14 @@ def show_my_okrs():
         # Team selection
         teams = get_teams()
         if teams:
-            team_options = {team[1]: team[0] for team in teams}
+            team_options = {team['name']: team['id'] for team in teams}
             selected_team = st.selectbox("Select Team", list(team_options.keys()))
             
             # User selection
             if selected_team:
                 team_users = get_team_users(team_options[selected_team])
                 if team_users:
-                    user_options = {user[1]: user[0] for user in team_users}
+                    user_options = {user['username']: user['id'] for user in team_users}
                     selected_user = st.selectbox("Assign to User", list(user_options.keys()))
                 else:
                     st.warning("No users found in selected team")
@@ -470,69 +800,65 @@ def show_my_okrs():
         
         if st.button("Create OKR"):
             if title and objective and key_results and selected_team and selected_user:
-                create_okr(
+                # Shown after the rerun below, which would otherwise drop the message
+                st.session_state.created_okr = create_okr(
                     title, description, objective, key_results,
                     team_options[selected_team], user_options[selected_user],
                     st.session_state.user['id'], start_date, end_date
                 )
-                st.success("OKR created successfully!")
                 st.rerun()
             else:
                 st.error("Please fill in all required fields")
     
+    created_okr = st.session_state.pop('created_okr', None)
+    if created_okr:
+        st.success(f"OKR '{created_okr['title']}' created successfully!")
+    
     # Display existing OKRs
     st.markdown("### Your OKRs")
-    user_okrs = get_okrs(user_id=st.session_state.user['id'])
+    user_okrs = get_okrs_summary(user_id=st.session_state.user['id'])
     
     if user_okrs:
-        for okr in user_okrs:
-            with st.container():
-                st.markdown('<div class="okr-card">', unsafe_allow_html=True)
-                
-                col1, col2, col3 = st.columns([2, 1, 1])
-                
-                with col1:
-                    st.markdown(f"### {okr[1]}")
-                    st.markdown(f"**Objective:** {okr[3]}")
-                    
-                    key_results = json.loads(okr[4])
-                    st.markdown("**Key Results:**")
-                    for i, kr in enumerate(key_results, 1):
-                        st.markdown(f"  {i}. {kr}")
-                
-                with col2:
-                    st.markdown(f"**Status:** {okr[6]}")
-                    st.markdown(f"**Team:** {okr[13]}")
-                    st.markdown(f"**Progress:** {okr[5]:.1f}%")
-                    st.progress(okr[5] / 100)
-                
-                with col3:
-                    # Update progress
-                    new_progress = st.slider(
-                        "Update Progress", 
-                        0, 100, 
-                        int(okr[5]), 
-                        key=f"progress_{okr[0]}"
-                    )
-                    
-                    new_status = st.selectbox(
-                        "Status",
-                        ["Not Started", "In Progress", "Completed", "On Hold"],
-                        index=["Not Started", "In Progress", "Completed", "On Hold"].index(okr[6]),
-                        key=f"status_{okr[0]}"
-                    )
-                    
-                    if st.button("Update", key=f"update_{okr[0]}"):
-                        update_okr_progress(okr[0], new_progress, new_status)
-                        st.success("OKR updated!")
-                        st.rerun()
-                    
-                    if st.button("Delete", key=f"delete_{okr[0]}"):
-                        delete_okr(okr[0])
-                        st.success("OKR deleted!")
-                        st.rerun()
-                
-                st.markdown('</div>', unsafe_allow_html=True)
+        original_df = pd.DataFrame(user_okrs).set_index('id')[['title', 'objective', 'team_name', 'progress', 'status']]
+        original_df['delete'] = False
+        
+        # One editable grid instead of a card with slider, selectbox and buttons per OKR
+        edited_df = st.data_editor(
+            original_df,
+            # Keyed on this user's rows so saved edits are not replayed onto the refreshed data,
+            # while writes to other users' OKRs leave unsaved edits alone
+            key=f"okrs_editor_{hash(tuple(tuple(okr.values()) for okr in user_okrs))}",
+            hide_index=True,
+            disabled=['title', 'objective', 'team_name'],
+            column_config={
+                'title': "Title",
+                'objective': "Objective",
+                'team_name': "Team",
+                'progress': st.column_config.NumberColumn("Progress", min_value=0, max_value=100, step=1, format="%d%%", required=True),
+                'status': st.column_config.SelectboxColumn("Status", options=STATUS_OPTIONS, required=True),
+                'delete': st.column_config.CheckboxColumn("Delete")
+            },
+            use_container_width=True
+        )
+        
+        if st.button("Save Changes"):
+            changed = (edited_df[['progress', 'status']] != original_df[['progress', 'status']]).any(axis=1)
+            # Cleared cells come back as NaN/None and must never be written as NULL
+            incomplete = (edited_df['progress'].isna() | edited_df['status'].isna()) & ~edited_df['delete']
+            to_update = edited_df[changed & ~edited_df['delete']]
+            to_delete = edited_df.index[edited_df['delete']]
+            
+            if incomplete.any():
+                st.error("Progress and status cannot be empty. No changes were saved.")
+            elif not to_update.empty or len(to_delete):
+                save_okr_changes(
+                    [(float(row.progress), row.status, int(okr_id)) for okr_id, row in to_update.iterrows()],
+                    [int(okr_id) for okr_id in to_delete]
+                )
+                st.success("OKRs updated!")
+                st.rerun()
+        
+        show_key_results(user_okrs, key="my_okrs_key_results")
     else:
         st.info("No OKRs found. Create your first OKR above!")
 
@@ -540,35 +866,26 @@ def show_team_okrs():
     st.markdown("## Team OKRs")
     
     if st.session_state.user['team_id']:
-        team_okrs = get_okrs(team_id=st.session_state.user['team_id'])
+        team_okrs = get_okrs_summary(team_id=st.session_state.user['team_id'])
         
         if team_okrs:
-            for okr in team_okrs:
-                with st.container():
-                    st.markdown('<div class="okr-card">', unsafe_allow_html=True)
-                    
-                    col1, col2 = st.columns([2, 1])
-                    
-                    with col1:
-                        st.markdown(f"### {okr[1]}")
-                        st.markdown(f"**Assigned to:** {okr[11]}")
-                        st.markdown(f"**Objective:** {okr[3]}")
-                        
-                        key_results = json.loads(okr[4])
-                        st.markdown("**Key Results:**")
-                        for i, kr in enumerate(key_results, 1):
-                            st.markdown(f"  {i}. {kr}")
-                    
-                    with col2:
-                        st.markdown(f"**Status:** {okr[6]}")
-                        st.markdown(f"**Progress:** {okr[5]:.1f}%")
-                        st.progress(okr[5] / 100)
-                        
-                        # Show dates
-                        st.markdown(f"**Start:** {okr[9]}")
-                        st.markdown(f"**End:** {okr[10]}")
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
+            team_df = pd.DataFrame(team_okrs)[['title', 'assigned_user', 'objective', 'status', 'progress', 'start_date', 'end_date']]
+            st.dataframe(
+                team_df,
+                hide_index=True,
+                column_config={
+                    'title': "Title",
+                    'assigned_user': "Assigned to",
+                    'objective': "Objective",
+                    'status': "Status",
+                    'progress': st.column_config.ProgressColumn("Progress", min_value=0, max_value=100, format="%.1f%%"),
+                    'start_date': "Start",
+                    'end_date': "End"
+                },
+                use_container_width=True
+            )
+            
+            show_key_results(team_okrs, key="team_okrs_key_results")
         else:
             st.info("No team OKRs found.")
     else:
@@ -582,6 +899,8 @@ def show_organization_setup():
         st.error("Only administrators can manage organization structure.")
         return
     
+    org_tree = get_org_tree()
+    
     tab1, tab2, tab3 = st.tabs(["Organizations", "Departments", "Teams"])
     
     with tab1:
@@ -594,22 +913,17 @@ def show_organization_setup():
             
             if st.button("Create Organization"):
                 if org_name:
-                    conn = sqlite3.connect('myokr.db')
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        INSERT INTO organizations (name, description)
-                        VALUES (?, ?)
-                    ''', (org_name, org_description))
-                    conn.commit()
-                    conn.close()
+                    with _write_lock:
+                        get_conn().execute(SQL_INSERT_ORGANIZATION, (org_name, org_description))
+                    _bump_data_version('org_version')
                     st.success("Organization created successfully!")
                     st.rerun()
         
         # Display organizations
-        orgs = get_organizations()
-        if orgs:
-            for org in orgs:
-                st.markdown(f"**{org[1]}** - {org[2] or 'No description'}")
+        for org in org_tree:
+            if org['id'] is None:
+                continue
+            st.markdown(f"**{org['name']}** - {org['description'] or 'No description'}")
     
     with tab2:
         st.subheader("Departments")
@@ -619,29 +933,28 @@ def show_organization_setup():
             dept_name = st.text_input("Department Name")
             dept_description = st.text_area("Description", key="dept_desc")
             
-            orgs = get_organizations()
-            if orgs:
-                org_options = {org[1]: org[0] for org in orgs}
+            org_options = {org['name']: org['id'] for org in org_tree if org['id'] is not None}
+            if org_options:
                 selected_org = st.selectbox("Select Organization", list(org_options.keys()))
                 
                 if st.button("Create Department"):
                     if dept_name and selected_org:
-                        conn = sqlite3.connect('myokr.db')
-                        cursor = conn.cursor()
-                        cursor.execute('''
-                            INSERT INTO departments (name, description, organization_id)
-                            VALUES (?, ?, ?)
-                        ''', (dept_name, dept_description, org_options[selected_org]))
-                        conn.commit()
-                        conn.close()
+                        with _write_lock:
+                            get_conn().execute(
+                                SQL_INSERT_DEPARTMENT,
+                                (dept_name, dept_description, org_options[selected_org])
+                            )
+                        _bump_data_version('org_version')
                         st.success("Department created successfully!")
                         st.rerun()
         
-        # Display departments
-        deps = get_departments()
-        if deps:
-            for dept in deps:
-                st.markdown(f"**{dept[1]}** - {dept[2] or 'No description'}")
+        # Display departments grouped by organization
+        for org in org_tree:
+            org_departments = [dept for dept in org['departments'] if dept['id'] is not None]
+            if org_departments:
+                st.markdown(f"#### {org['name']}")
+                for dept in org_departments:
+                    st.markdown(f"**{dept['name']}** - {dept['description'] or 'No description'}")
     
     with tab3:
         st.subheader("Teams")
@@ -651,85 +964,62 @@ def show_organization_setup():
             team_name = st.text_input("Team Name")
             team_description = st.text_area("Description", key="team_desc")
             
-            deps = get_departments()
+            deps = [dept for org in org_tree for dept in org['departments'] if dept['id'] is not None]
             if deps:
-                dept_options = {dept[1]: dept[0] for dept in deps}
+                dept_options = {dept['name']: dept['id'] for dept in deps}
                 selected_dept = st.selectbox("Select Department", list(dept_options.keys()))
                 
                 if st.button("Create Team"):
                     if team_name and selected_dept:
-                        conn = sqlite3.connect('myokr.db')
-                        cursor = conn.cursor()
-                        cursor.execute('''
-                            INSERT INTO teams (name, description, department_id)
-                            VALUES (?, ?, ?)
-                        ''', (team_name, team_description, dept_options[selected_dept]))
-                        conn.commit()
-                        conn.close()
+                        with _write_lock:
+                            get_conn().execute(
+                                SQL_INSERT_TEAM,
+                                (team_name, team_description, dept_options[selected_dept])
+                            )
+                        _bump_data_version('org_version')
                         st.success("Team created successfully!")
                         st.rerun()
         
-        # Display teams
-        teams = get_teams()
-        if teams:
-            for team in teams:
-                st.markdown(f"**{team[1]}** - {team[2] or 'No description'}")
+        # Display teams grouped by organization and department
+        for org in org_tree:
+            for dept in org['departments']:
+                if dept['teams']:
+                    st.markdown(f"#### {org['name']} / {dept['name']}")
+                    for team in dept['teams']:
+                        st.markdown(f"**{team['name']}** - {team['description'] or 'No description'}")
 
 def show_analytics():
     st.markdown("## Analytics Dashboard")
     
-    # Get all OKRs for analytics
-    all_okrs = get_okrs()
+    status_counts = get_status_counts()
     
-    if not all_okrs:
+    if status_counts.empty:
         st.info("No OKRs available for analytics.")
         return
     
-    # Convert to DataFrame for easier manipulation
-    df = pd.DataFrame(all_okrs, columns=[
-        'id', 'title', 'description', 'objective', 'key_results', 'progress',
-        'status', 'team_id', 'assigned_user_id', 'created_by', 'start_date',
-        'end_date', 'created_at', 'assigned_user', 'created_by_user', 'team_name'
-    ])
+    progress_bins = get_progress_bins()
+    team_performance = get_team_performance()
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Progress distribution
         st.subheader("Progress Distribution")
-        progress_bins = pd.cut(df['progress'], bins=[0, 25, 50, 75, 100], 
-                              labels=['0-25%', '26-50%', '51-75%', '76-100%'])
-        progress_counts = progress_bins.value_counts()
-        
-        fig = px.pie(values=progress_counts.values, names=progress_counts.index,
-                     title="OKR Progress Distribution")
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_progress_pie(tuple(progress_bins.itertuples(index=False, name=None))), use_container_width=True)
     
     with col2:
         # Status distribution
         st.subheader("Status Distribution")
-        status_counts = df['status'].value_counts()
-        
-        fig = px.bar(x=status_counts.index, y=status_counts.values,
-                     title="OKR Status Distribution")
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_status_bar(tuple(status_counts.itertuples(index=False, name=None))), use_container_width=True)
     
     # Team performance
     st.subheader("Team Performance")
-    team_stats = df.groupby('team_name').agg({
-        'progress': 'mean',
-        'id': 'count'
-    }).round(2)
-    team_stats.columns = ['Average Progress', 'Total OKRs']
-    
-    fig = px.bar(x=team_stats.index, y=team_stats['Average Progress'],
-                 title="Average Progress by Team")
-    st.plotly_chart(fig, use_container_width=True)
+    team_progress = tuple(zip(team_performance['team_name'], team_performance['avg_progress']))
+    st.plotly_chart(build_team_progress_bar(team_progress), use_container_width=True)
     
     # Detailed table
     st.subheader("Detailed OKR Table")
-    display_df = df[['title', 'objective', 'progress', 'status', 'assigned_user', 'team_name']]
-    st.dataframe(display_df, use_container_width=True)
+    st.dataframe(get_okr_table(), use_container_width=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file